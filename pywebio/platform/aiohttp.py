@@ -1,6 +1,5 @@
 import asyncio
 import fnmatch
-import json
 import logging
 from functools import partial
 from os import path, listdir
@@ -10,10 +9,11 @@ from aiohttp import web
 
 from .remote_access import start_remote_access_service
 from .tornado import open_webbrowser_on_server_started
-from .utils import make_applications, render_page, cdn_validation, deserialize_binary_event
-from ..session import CoroutineBasedSession, ThreadBasedSession, register_session_implement_for_target, Session
+from .utils import make_applications, render_page, cdn_validation, deserialize_binary_event, dumps_msg
+from ..session import CoroutineBasedSession, ThreadBasedSession, register_session_implement_for_target, \
+    get_session_implement_for_target, Session
 from ..session.base import get_session_info_from_headers
-from ..utils import get_free_port, STATIC_PATH, iscoroutinefunction, isgeneratorfunction
+from ..utils import get_free_port, STATIC_PATH
 
 logger = logging.getLogger(__name__)
 
@@ -69,7 +69,7 @@ def _webio_handler(applications, cdn, websocket_settings, check_origin_func=_is_
 
         def send_msg_to_client(session: Session):
             for msg in session.get_task_commands():
-                msg_str = json.dumps(msg)
+                msg_str = dumps_msg(msg)
                 ioloop.create_task(ws.send_str(msg_str))
 
         def close_from_session():
@@ -87,7 +87,7 @@ def _webio_handler(applications, cdn, websocket_settings, check_origin_func=_is_
         app_name = request.query.getone('app', 'index')
         application = applications.get(app_name) or applications['index']
 
-        if iscoroutinefunction(application) or isgeneratorfunction(application):
+        if get_session_implement_for_target(application) is CoroutineBasedSession:
             session = CoroutineBasedSession(application, session_info=session_info,
                                             on_task_command=send_msg_to_client,
                                             on_session_close=close_from_session)
@@ -1,4 +1,3 @@
-import json
 import logging
 import os
 import threading
@@ -8,7 +7,7 @@ from django.http import HttpResponse, HttpRequest
 from . import utils
 from .httpbased import HttpContext, HttpHandler, run_event_loop
 from .remote_access import start_remote_access_service
-from .utils import make_applications, cdn_validation
+from .utils import make_applications, cdn_validation, dumps_msg
 from ..utils import STATIC_PATH, iscoroutinefunction, isgeneratorfunction, get_free_port, parse_file_size
 
 logger = logging.getLogger(__name__)
@@ -57,7 +56,7 @@ class DjangoHttpContext(HttpContext):
         # self.response.content accept str and byte
         if json_type:
             self.set_header('content-type', 'application/json')
-            self.response.content = json.dumps(content)
+            self.response.content = dumps_msg(content)
         else:
             self.response.content = content
 
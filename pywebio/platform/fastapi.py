@@ -13,10 +13,12 @@ from starlette.websockets import WebSocketDisconnect
 
 from .remote_access import start_remote_access_service
 from .tornado import open_webbrowser_on_server_started
-from .utils import make_applications, render_page, cdn_validation, OriginChecker, deserialize_binary_event
-from ..session import CoroutineBasedSession, ThreadBasedSession, register_session_implement_for_target, Session
+from .utils import make_applications, render_page, cdn_validation, OriginChecker, deserialize_binary_event, \
+    dumps_msg
+from ..session import CoroutineBasedSession, ThreadBasedSession, register_session_implement_for_target, \
+    get_session_implement_for_target, Session
 from ..session.base import get_session_info_from_headers
-from ..utils import get_free_port, STATIC_PATH, iscoroutinefunction, isgeneratorfunction, strip_space
+from ..utils import get_free_port, STATIC_PATH, strip_space
 
 logger = logging.getLogger(__name__)
 
@@ -50,7 +52,7 @@ def _webio_routes(applications, cdn, check_origin_func):
 
         def send_msg_to_client(session: Session):
             for msg in session.get_task_commands():
-                ioloop.create_task(websocket.send_json(msg))
+                ioloop.create_task(websocket.send_text(dumps_msg(msg)))
 
         def close_from_session():
             nonlocal close_from_session_tag
@@ -67,7 +69,7 @@ def _webio_routes(applications, cdn, check_origin_func):
         app_name = websocket.query_params.get('app', 'index')
         application = applications.get(app_name) or applications['index']
 
-        if iscoroutinefunction(application) or isgeneratorfunction(application):
+        if get_session_implement_for_target(application) is CoroutineBasedSession:
             session = CoroutineBasedSession(application, session_info=session_info,
                                             on_task_command=send_msg_to_client,
                                             on_session_close=close_from_session)
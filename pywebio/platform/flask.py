@@ -1,7 +1,6 @@
 """
 Flask backend
 """
-import json
 import logging
 import threading
 
@@ -10,7 +9,7 @@ from flask import Flask, request, send_from_directory, Response
 from . import utils
 from .httpbased import HttpContext, HttpHandler, run_event_loop
 from .remote_access import start_remote_access_service
-from .utils import make_applications, cdn_validation
+from .utils import make_applications, cdn_validation, dumps_msg
 from ..utils import STATIC_PATH, iscoroutinefunction, isgeneratorfunction
 from ..utils import get_free_port, parse_file_size
 
@@ -60,7 +59,7 @@ class FlaskHttpContext(HttpContext):
         # self.response.data accept str and bytes
         if json_type:
             self.set_header('content-type', 'application/json')
-            self.response.data = json.dumps(content)
+            self.response.data = dumps_msg(content)
         else:
             self.response.data = content
 
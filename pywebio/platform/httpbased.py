@@ -17,9 +17,10 @@ from contextlib import contextmanager
 from typing import Dict
 
 from .utils import make_applications, render_page, deserialize_binary_event
-from ..session import CoroutineBasedSession, Session, ThreadBasedSession, register_session_implement_for_target
+from ..session import CoroutineBasedSession, Session, register_session_implement_for_target, \
+    get_session_implement_for_target
 from ..session.base import get_session_info_from_headers
-from ..utils import random_str, LRUDict, isgeneratorfunction, iscoroutinefunction, check_webio_js
+from ..utils import random_str, LRUDict, check_webio_js
 
 
 class HttpContext:
@@ -241,10 +242,7 @@ class HttpHandler:
 
             application = self.app_loader(context)
 
-            if iscoroutinefunction(application) or isgeneratorfunction(application):
-                session_cls = CoroutineBasedSession
-            else:
-                session_cls = ThreadBasedSession
+            session_cls = get_session_implement_for_target(application)
             webio_session = session_cls(application, session_info=session_info)
             cls._webio_sessions[webio_session_id] = webio_session
             yield type(self).WAIT_MS_ON_POST / 1000.0  # <--- <--- <--- <--- <--- <--- <--- <--- <--- <--- <--- <---
@@ -18,12 +18,11 @@ from tornado.websocket import WebSocketHandler
 
 from . import utils
 from .remote_access import start_remote_access_service
-from .utils import make_applications, render_page, cdn_validation, deserialize_binary_event
+from .utils import make_applications, render_page, cdn_validation, deserialize_binary_event, dumps_msg
 from ..session import CoroutineBasedSession, ThreadBasedSession, ScriptModeSession, \
-    register_session_implement_for_target, Session
+    register_session_implement_for_target, get_session_implement_for_target, Session
 from ..session.base import get_session_info_from_headers
-from ..utils import get_free_port, wait_host_port, STATIC_PATH, iscoroutinefunction, isgeneratorfunction, \
-    check_webio_js, parse_file_size, random_str, LRUDict
+from ..utils import get_free_port, wait_host_port, STATIC_PATH, check_webio_js, parse_file_size, random_str, LRUDict
 
 logger = logging.getLogger(__name__)
 
@@ -143,7 +142,7 @@ def _webio_handler(applications=None, cdn=True, reconnect_timeout=0, check_origi
                 return
 
             for msg in session.get_task_commands():
-                conn.write_message(json.dumps(msg))
+                conn.write_message(dumps_msg(msg))
 
         @classmethod
         def close_from_session(cls, session_id=None):
@@ -176,7 +175,7 @@ def _webio_handler(applications=None, cdn=True, reconnect_timeout=0, check_origi
                 self.session_id = random_str(24)
                 cls._connections[self.session_id] = self
 
-                if iscoroutinefunction(application) or isgeneratorfunction(application):
+                if get_session_implement_for_target(application) is CoroutineBasedSession:
                     self.session = CoroutineBasedSession(
                         application, session_info=session_info,
                         on_task_command=partial(self.send_msg_to_client, session_id=self.session_id),
@@ -1,4 +1,3 @@
-import json
 import logging
 
 import tornado.ioloop
@@ -7,7 +6,7 @@ import tornado.web
 from . import utils
 from .httpbased import HttpContext, HttpHandler
 from .tornado import set_ioloop, _setup_server, open_webbrowser_on_server_started
-from .utils import cdn_validation
+from .utils import cdn_validation, dumps_msg
 from ..utils import parse_file_size
 
 logger = logging.getLogger(__name__)
@@ -56,7 +55,7 @@ class TornadoHttpContext(HttpContext):
         # self.response.content accept str and byte
         if json_type:
             self.set_header('content-type', 'application/json')
-            self.response = json.dumps(content)
+            self.response = dumps_msg(content)
         else:
             self.response = content
 
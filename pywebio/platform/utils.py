@@ -15,6 +15,11 @@ from ..exceptions import PyWebIOWarning
 from ..utils import isgeneratorfunction, iscoroutinefunction, get_function_name, get_function_doc, \
     get_function_attr, STATIC_PATH
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 """
 The maximum size in bytes of a http request body or a websocket message, after which the request or websocket is aborted
 Set by `start_server()` or `path_deploy()` 
@@ -24,6 +29,21 @@ MAX_PAYLOAD_SIZE = 0
 
 DEFAULT_CDN = "https://cdn.jsdelivr.net/gh/wang0618/PyWebIO-assets@v{version}/"
 
+
+def dumps_msg(msg) -> str:
+    """将发送给浏览器的消息序列化为json字符串。若安装了 `orjson <https://github.com/ijl/orjson>`_ 则使用其进行序列化，
+    可以使用 ``pip install pywebio[orjson]`` 安装
+    Serialize the message sent to browser into json string, use `orjson` to serialize it when it's installed,
+    which can be installed by ``pip install pywebio[orjson]``.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(msg, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY).decode('utf8')
+        except TypeError:  # such as integer exceeds 64-bit range, fall back to stdlib json
+            pass
+    return json.dumps(msg)
+
+
 _global_config = {'title': 'PyWebIO Application'}
 config_keys = ['title', 'description', 'js_file', 'js_code', 'css_style', 'css_file', 'theme']
 AppMeta = namedtuple('App', config_keys)
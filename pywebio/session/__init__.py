@@ -160,12 +160,13 @@ r"""
 """
 
 import threading
+import weakref
 from base64 import b64encode
 from functools import wraps
 
 import user_agents
 
-from .base import Session
+from .base import Session, _current_session
 from .coroutinebased import CoroutineBasedSession
 from .threadbased import ThreadBasedSession, ScriptModeSession
 from ..exceptions import SessionNotFoundException, SessionException
@@ -176,54 +177,92 @@ from ..utils import iscoroutinefunction, isgeneratorfunction, run_as_function, t
 # List of session implementations currently in use
 _active_session_cls = []
 
+# 当前进程中只有一个正在使用的会话实现时，为该会话实现，否则为 None
+# The only session implementation currently in use, or None if there are zero or multiple implementations in use
+_single_session_cls = None
+
+# 任务函数 -> 会话实现 的缓存
+# Cache of task function -> session implementation
+_impl_cache = weakref.WeakKeyDictionary()
+
 __all__ = ['run_async', 'run_asyncio_coroutine', 'register_thread', 'hold', 'defer_call', 'data', 'get_info',
            'run_js', 'eval_js', 'download', 'set_env', 'go_app', 'local', 'info']
 
 
-def register_session_implement(cls):
+def _add_session_implement(cls):
+    global _single_session_cls
     if cls not in _active_session_cls:
         _active_session_cls.append(cls)
 
+    _single_session_cls = _active_session_cls[0] if len(_active_session_cls) == 1 else None
+
+
+def register_session_implement(cls):
+    _add_session_implement(cls)
+    return cls
+
+
+def get_session_implement_for_target(target_func):
+    """根据target_func函数类型获取会话实现，结果会按函数缓存。Backend在创建会话时调用
+    Get the session implementation according to the target_func function type, the result is cached per function.
+    Called by backend when creating session"""
+    try:
+        cls = _impl_cache.get(target_func)
+    except TypeError:  # `target_func` is not hashable or can't be weakly referenced
+        cls = None
+
+    if cls is None:
+        if iscoroutinefunction(target_func) or isgeneratorfunction(target_func):
+            cls = CoroutineBasedSession
+        else:
+            cls = ThreadBasedSession
+
+        try:
+            _impl_cache[target_func] = cls
+        except TypeError:
+            pass
+
     return cls
 
 
 def register_session_implement_for_target(target_func):
     """根据target_func函数类型注册会话实现，并返回会话实现
     Register the session implementation according to the target_func function type, and return the session implementation"""
-    if iscoroutinefunction(target_func) or isgeneratorfunction(target_func):
-        cls = CoroutineBasedSession
-    else:
-        cls = ThreadBasedSession
+    cls = get_session_implement_for_target(target_func)
 
     if ScriptModeSession in _active_session_cls:
         raise RuntimeError("Already in script mode, can't start server")
 
-    if cls not in _active_session_cls:
-        _active_session_cls.append(cls)
-
+    _add_session_implement(cls)
     return cls
 
 
 def get_session_implement():
     """获取当前会话实现。仅供内部实现使用。应在会话上下文中调用
     Get the current session implementation. For internal implementation use only. Should be called in session context"""
-    if not _active_session_cls:
-        _active_session_cls.append(ScriptModeSession)
-        _start_script_mode_server()
-
     # 当前正在使用的会话实现只有一个
     # There is only one session implementation currently in use
-    if len(_active_session_cls) == 1:
-        return _active_session_cls[0]
+    if _single_session_cls is not None:
+        return _single_session_cls
+
+    # 当前有多个正在使用的会话实现，或者还没有会话实现被使用
+    # There are currently multiple session implementations in use, or no session implementation is used yet
+    # 优先使用会话实现在进入任务上下文时设置的会话
+    # Prefer the session set by the session implementation when entering task context
+    session = _current_session.get()
+    if session is not None and session.in_current_context():
+        return type(session)
 
-    # 当前有多个正在使用的会话实现
-    # There are currently multiple session implementations in use
     for cls in _active_session_cls:
-        try:
-            cls.get_current_session()
+        if cls.has_current_session():
             return cls
-        except SessionNotFoundException:
-            pass
+
+    # 没有会话实现被使用时，进入Script mode
+    # Enter script mode when no session implementation is used
+    if not _active_session_cls:
+        _add_session_implement(ScriptModeSession)
+        _start_script_mode_server()
+        return ScriptModeSession
 
     raise SessionNotFoundException
 
@@ -233,37 +272,39 @@ def _start_script_mode_server():
     start_server_in_current_thread_session()
 
 
-def get_current_session() -> "Session":
-    return get_session_implement().get_current_session()
-
+def _send_msg(cmd, spec=None):
+    """`pywebio.io_ctrl.send_msg` 的延迟导入版本，首次调用后被替换为 `send_msg` 本身
+    Lazily imported `pywebio.io_ctrl.send_msg`, replaced by `send_msg` itself after the first call.
 
-def get_current_task_id():
-    return get_session_implement().get_current_task_id()
+    `pywebio.io_ctrl` imports this module, so `send_msg` can't be imported at module level.
+    """
+    global _send_msg
+    from ..io_ctrl import send_msg
+    _send_msg = send_msg
+    return send_msg(cmd, spec=spec)
 
 
-def check_session_impl(session_type):
-    def decorator(func):
-        """装饰器：在函数调用前检查当前会话实现是否满足要求
-        Decorator: Check whether the current session implementation meets the requirements before the function call"""
+def get_current_session() -> "Session":
+    session = _current_session.get()
+    if session is not None and not session.closed() and session.in_current_context():
+        return session
 
-        @wraps(func)
-        def inner(*args, **kwargs):
-            curr_impl = get_session_implement()
+    # 会话已关闭或上下文变量中的会话不属于当前上下文时(比如在任务中创建的asyncio任务)，由会话实现获取会话或抛出相应的异常
+    # When the session is closed or the session in context variable doesn't belong to current context
+    # (such as an asyncio task created in a task), let the session implementation get the session or raise exception
+    return get_session_implement().get_current_session()
 
-            # Check if 'now_impl' is a derived from session_type or is the same class
-            if not issubclass(curr_impl, session_type):
-                func_name = getattr(func, '__name__', str(func))
-                require = getattr(session_type, '__name__', str(session_type))
-                curr = getattr(curr_impl, '__name__', str(curr_impl))
 
-                raise RuntimeError("Only can invoke `{func_name:s}` in {require:s} context."
-                                   " You are now in {curr:s} context".format(func_name=func_name, require=require,
-                                                                             curr=curr))
-            return func(*args, **kwargs)
+def get_current_task_id():
+    return get_session_implement().get_current_task_id()
 
-        return inner
 
-    return decorator
+def _raise_impl_error(func_name, session_type, session):
+    """当前会话实现不满足要求时抛出异常
+    Raise error when the current session implementation doesn't meet the requirements"""
+    raise RuntimeError("Only can invoke `{func_name:s}` in {require:s} context."
+                       " You are now in {curr:s} context".format(func_name=func_name, require=session_type.__name__,
+                                                                 curr=type(session).__name__))
 
 
 def chose_impl(gen_func):
@@ -277,21 +318,35 @@ def chose_impl(gen_func):
     @wraps(gen_func)
     def inner(*args, **kwargs):
         gen = gen_func(*args, **kwargs)
-        if get_session_implement() == CoroutineBasedSession:
+        if get_session_implement() is CoroutineBasedSession:
             return to_coroutine(gen)
-        else:
-            return run_as_function(gen)
+        return run_as_function(gen)
 
     return inner
 
 
-@chose_impl
 def next_client_event():
-    res = yield get_current_session().next_client_event()
-    return res
+    # 基于协程的会话中 `Session.next_client_event()` 返回协程对象，基于线程的会话中则直接返回事件
+    # `Session.next_client_event()` returns a coroutine object in coroutine-based session,
+    # and returns the event directly in thread-based session
+    return get_current_session().next_client_event()
+
+
+def _hold_sync():
+    while True:
+        try:
+            get_current_session().next_client_event()
+        except SessionException:
+            return
+
+
+async def _hold_async():
+    # 与基于线程的会话不同，会话关闭时 SessionException 会被抛出给调用方
+    # Unlike the thread-based session, SessionException is raised to the caller when the session closed
+    while True:
+        await get_current_session().next_client_event()
 
 
-@chose_impl
 def hold():
     """Keep the session alive until the browser page is closed by user.
 
@@ -310,11 +365,9 @@ def hold():
         so that the event callback and download link will always be available before the browser page is closed by user.
 
     """
-    while True:
-        try:
-            yield next_client_event()
-        except SessionException:
-            return
+    if get_session_implement() is CoroutineBasedSession:
+        return _hold_async()
+    return _hold_sync()
 
 
 def download(name, content):
@@ -332,9 +385,8 @@ def download(name, content):
         put_button('Click to download', lambda: download('hello-world.txt', b'hello world!'))
 
     """
-    from ..io_ctrl import send_msg
     content = b64encode(content).decode('ascii')
-    send_msg('download', spec=dict(name=name, content=content))
+    _send_msg('download', spec={'name': name, 'content': content})
 
 
 def run_js(code_, **args):
@@ -350,8 +402,7 @@ def run_js(code_, **args):
         run_js('console.log(a + b)', a=1, b=2)
 
     """
-    from ..io_ctrl import send_msg
-    send_msg('run_script', spec=dict(code=code_, args=args))
+    _send_msg('run_script', spec={'code': code_, 'args': args})
 
 
 @chose_impl
@@ -397,16 +448,14 @@ def eval_js(expression_, **args):
        The JS expression support return promise.
     """
 
-    from ..io_ctrl import send_msg
-    send_msg('run_script', spec=dict(code=expression_, args=args, eval=True))
+    _send_msg('run_script', spec={'code': expression_, 'args': args, 'eval': True})
 
     res = yield next_client_event()
-    assert res['event'] == 'js_yield', "Internal Error, please report this bug on " \
-                                       "https://github.com/wang0618/PyWebIO/issues"
+    if res['event'] != 'js_yield':
+        raise RuntimeError("Internal Error, please report this bug on https://github.com/wang0618/PyWebIO/issues")
     return res['data']
 
 
-@check_session_impl(CoroutineBasedSession)
 def run_async(coro_obj):
     """Run the coroutine object asynchronously. PyWebIO interactive functions are also available in the coroutine.
 
@@ -418,11 +467,13 @@ def run_async(coro_obj):
 
     See also: :ref:`Concurrency in coroutine-based sessions <coroutine_based_concurrency>`
     """
-    return get_current_session().run_async(coro_obj)
+    session = get_current_session()
+    if not isinstance(session, CoroutineBasedSession):
+        _raise_impl_error('run_async', CoroutineBasedSession, session)
+    return session.run_async(coro_obj)
 
 
-@check_session_impl(CoroutineBasedSession)
-async def run_asyncio_coroutine(coro_obj):
+def run_asyncio_coroutine(coro_obj):
     """
     If the thread running sessions are not the same as the thread running the asyncio event loop,
     you need to wrap ``run_asyncio_coroutine()`` to run the coroutine in asyncio.
@@ -441,10 +492,12 @@ async def run_asyncio_coroutine(coro_obj):
         pywebio.platform.flask.start_server(app)
 
     """
-    return await get_current_session().run_asyncio_coroutine(coro_obj)
+    session = get_current_session()
+    if not isinstance(session, CoroutineBasedSession):
+        _raise_impl_error('run_asyncio_coroutine', CoroutineBasedSession, session)
+    return session.run_asyncio_coroutine(coro_obj)
 
 
-@check_session_impl(ThreadBasedSession)
 def register_thread(thread: threading.Thread):
     """Register the thread so that PyWebIO interactive functions are available in the thread.
 
@@ -454,7 +507,10 @@ def register_thread(thread: threading.Thread):
 
     :param threading.Thread thread: Thread object
     """
-    return get_current_session().register_thread(thread)
+    session = get_current_session()
+    if not isinstance(session, ThreadBasedSession):
+        _raise_impl_error('register_thread', ThreadBasedSession, session)
+    return session.register_thread(thread)
 
 
 def defer_call(func):
@@ -475,7 +531,7 @@ def defer_call(func):
     .. attention:: PyWebIO interactive functions cannot be called inside the deferred functions.
 
     """
-    get_current_session().defer_call(func)
+    get_current_session().deferred_functions.append(func)
     return func
 
 
@@ -498,6 +554,13 @@ def data():
     return local
 
 
+# 可用的会话环境配置项
+# Available configuration of `set_env()`
+_SET_ENV_KEYS = frozenset({'title', 'output_animation', 'auto_scroll_bottom', 'http_pull_interval', 'output_max_width',
+                           'input_panel_min_height', 'input_panel_init_height', 'input_panel_fixed',
+                           'input_auto_focus'})
+
+
 def set_env(**env_info):
     """configure the environment of current session.
 
@@ -526,11 +589,8 @@ def set_env(**env_info):
 
        Added the ``output_max_width`` parameter
     """
-    from ..io_ctrl import send_msg
-    assert all(k in ('title', 'output_animation', 'auto_scroll_bottom', 'http_pull_interval', 'output_max_width',
-                     'input_panel_min_height', 'input_panel_init_height', 'input_panel_fixed', 'input_auto_focus')
-               for k in env_info.keys())
-    send_msg('set_env', spec=env_info)
+    assert env_info.keys() <= _SET_ENV_KEYS
+    _send_msg('set_env', spec=env_info)
 
 
 def go_app(name, new_window=True):
@@ -5,10 +5,14 @@ from collections import defaultdict
 
 import user_agents
 
-from ..utils import catch_exp_call
+from ..utils import catch_exp_call, ContextVar
 
 logger = logging.getLogger(__name__)
 
+# 当前上下文中的会话，由会话实现在进入任务上下文时设置
+# The session of current context, set by session implementation when entering task context
+_current_session = ContextVar('_current_session', default=None)
+
 
 class Session:
     """
@@ -20,6 +24,8 @@ class Session:
 
     由Task在当前Session上下文中调用：
         get_current_session
+        has_current_session
+        in_current_context
         get_current_task_id
 
         get_scope_name
@@ -50,6 +56,16 @@ class Session:
     def get_current_session() -> "Session":
         raise NotImplementedError
 
+    @classmethod
+    def has_current_session(cls) -> bool:
+        """当前上下文中是否存在该会话实现的会话(会话可能已关闭)。与 get_current_session 不同，本方法不抛出异常"""
+        raise NotImplementedError
+
+    def in_current_context(self) -> bool:
+        """当前会话是否为当前上下文中的会话。用于校验从 `_current_session` 上下文变量中获取的会话，
+        因为上下文变量会被在任务上下文中创建的asyncio任务或线程继承"""
+        raise NotImplementedError
+
     @staticmethod
     def get_current_task_id():
         raise NotImplementedError
@@ -62,7 +78,7 @@ class Session:
         self.save = {}  # underlying implement of `pywebio.session.data`
         self.scope_stack = defaultdict(lambda: ['ROOT'])  # task_id -> scope栈
 
-        self.deferred_functions = []  # 会话结束时运行的函数
+        self.deferred_functions = []  # 会话结束时运行的函数，`pywebio.session.defer_call()` 会直接向其中添加函数
         self._closed = False
 
     def get_scope_name(self, idx):
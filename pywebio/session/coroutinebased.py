@@ -4,7 +4,7 @@ import threading
 from contextlib import contextmanager
 from functools import partial
 
-from .base import Session
+from .base import Session, _current_session
 from ..exceptions import SessionNotFoundException, SessionClosedException, SessionException
 from ..utils import random_str, isgeneratorfunction, iscoroutinefunction
 
@@ -52,6 +52,13 @@ class CoroutineBasedSession(Session):
 
         return _context.current_session
 
+    @classmethod
+    def has_current_session(cls) -> bool:
+        return _context.current_session is not None and cls.event_loop_thread_id == threading.current_thread().ident
+
+    def in_current_context(self) -> bool:
+        return _context.current_session is self and type(self).event_loop_thread_id == threading.current_thread().ident
+
     @staticmethod
     def get_current_task_id():
         if _context.current_task_id is None:
@@ -100,8 +107,8 @@ class CoroutineBasedSession(Session):
     async def _start_main_task(self, target):
         await target()
         if self.need_keep_alive():
-            from ..session import hold
-            await hold()
+            from ..session import _hold_async
+            await _hold_async()
 
     def _step_task(self, task, result=None):
         asyncio.get_event_loop().call_soon_threadsafe(partial(task.step, result))
@@ -272,9 +279,11 @@ class Task:
         # todo issue: with 语句可能发生嵌套，导致内层with退出时，将属性置空
         _context.current_session = self.session
         _context.current_task_id = self.coro_id
+        session_token = _current_session.set(self.session)
         try:
             yield
         finally:
+            _current_session.reset(session_token)
             _context.current_session = None
             _context.current_task_id = None
 
@@ -3,7 +3,7 @@ import queue
 import threading
 from functools import wraps
 
-from .base import Session
+from .base import Session, _current_session
 from ..exceptions import SessionNotFoundException, SessionClosedException, SessionException
 from ..utils import random_str, LimitedSizeQueue, isgeneratorfunction, iscoroutinefunction, \
     get_function_name
@@ -36,6 +36,13 @@ class ThreadBasedSession(Session):
                                            "Maybe session closed or forget to use `register_thread()`.")
         return session
 
+    @classmethod
+    def has_current_session(cls) -> bool:
+        return id(threading.current_thread()) in cls.thread2session
+
+    def in_current_context(self) -> bool:
+        return self.thread2session.get(id(threading.current_thread())) is self
+
     @classmethod
     def get_current_task_id(cls):
         return cls._get_task_id(threading.current_thread())
@@ -66,6 +73,7 @@ class ThreadBasedSession(Session):
 
         self.threads = []  # 注册到当前会话的线程集合
         self.unhandled_task_msgs = LimitedSizeQueue(maxsize=self.unhandled_task_mq_maxsize)
+        self._task_command_notify_pending = False  # 是否已在事件循环中安排了 on_task_command 调用
 
         self.task_mqs = {}  # task_id -> event msg queue
         self._closed = False
@@ -82,6 +90,7 @@ class ThreadBasedSession(Session):
 
         @wraps(target)
         def main_task(target):
+            _current_session.set(self)
             try:
                 target()
             except Exception as e:
@@ -94,8 +103,8 @@ class ThreadBasedSession(Session):
 
                 try:
                     if self.need_keep_alive():
-                        from ..session import hold
-                        hold()
+                        from ..session import _hold_sync
+                        _hold_sync()
                     else:
                         self.send_task_command(dict(command='close_session'))
                 except SessionException:  # ignore SessionException error
@@ -121,10 +130,23 @@ class ThreadBasedSession(Session):
         self.unhandled_task_msgs.put(command)
 
         if self._loop:
-            self._loop.call_soon_threadsafe(self._on_task_command, self)
+            # 合并通知：已安排的 on_task_command 调用会处理其执行之前产生的所有消息
+            # Coalesce notifications: the scheduled `on_task_command` call handles all messages produced before it runs
+            if not self._task_command_notify_pending:
+                self._task_command_notify_pending = True
+                self._loop.call_soon_threadsafe(self._notify_task_command)
         else:
             self._on_task_command(self)
 
+    def _notify_task_command(self):
+        """在事件循环线程中通知Backend处理未处理的消息
+        Notify the backend to handle the unhandled messages, run in event loop thread"""
+        # 需要在调用 on_task_command 之前重置标志，保证调用期间产生的新消息会再次安排通知
+        # The flag must be reset before calling `on_task_command`,
+        # so that new messages produced during the call will schedule another notification
+        self._task_command_notify_pending = False
+        self._on_task_command(self)
+
     def next_client_event(self):
         # 函数开始不需要判断 self.closed()
         # 如果会话关闭，对 get_current_session().next_client_event() 的调用会抛出SessionNotFoundException
@@ -233,6 +255,7 @@ class ThreadBasedSession(Session):
         logger.debug('Callback thread start')
 
     def _dispatch_callback_event(self):
+        _current_session.set(self)
         while not self.closed():
             event = self.callback_mq.get()
             if event is None:  # 结束信号
@@ -247,6 +270,7 @@ class ThreadBasedSession(Session):
 
             @wraps(callback)
             def run(callback):
+                _current_session.set(self)
                 try:
                     callback(event['data'])
                 except Exception:
@@ -303,6 +327,10 @@ class ScriptModeSession(ThreadBasedSession):
             raise SessionClosedException()
         return cls.instance
 
+    @classmethod
+    def has_current_session(cls) -> bool:
+        return cls.instance is not None
+
     @classmethod
     def get_current_task_id(cls):
         task_id = super().get_current_task_id()
@@ -6,6 +6,7 @@ import queue
 import random
 import socket
 import string
+import threading
 import time
 from collections import OrderedDict
 from contextlib import closing
@@ -15,6 +16,38 @@ project_dir = dirname(abspath(__file__))
 
 STATIC_PATH = join(project_dir, 'html')
 
+try:
+    from contextvars import ContextVar
+except ImportError:  # `contextvars` is new in Python 3.7
+    class ContextVar:
+        """`contextvars.ContextVar` 的简单替代实现，使用线程本地存储保存变量值
+        Minimal substitute of `contextvars.ContextVar` for Python < 3.7, the value is stored in thread-local storage"""
+        _MISSING = object()
+
+        def __init__(self, name, default=_MISSING):
+            self.name = name
+            self._default = default
+            self._local = threading.local()
+
+        def get(self, default=_MISSING):
+            value = getattr(self._local, 'value', self._MISSING)
+            if value is self._MISSING:
+                value = self._default if default is self._MISSING else default
+            if value is self._MISSING:
+                raise LookupError(self)
+            return value
+
+        def set(self, value):
+            token = getattr(self._local, 'value', self._MISSING)  # use the previous value as token
+            self._local.value = value
+            return token
+
+        def reset(self, token):
+            if token is self._MISSING:
+                del self._local.value
+            else:
+                self._local.value = token
+
 
 def pyinstaller_datas(cli_args=False):
     """Return data files included in the PyWebIO to be added to pyinstaller bundle."""
@@ -76,32 +109,37 @@ class ObjectDictProxy:
         # 使用 self.__dict__ 避免触发 __setattr__
         self.__dict__['_dict_getter'] = dict_getter
 
+    # 以下方法直接调用 self._dict_getter() 而不是通过 self._dict 属性访问，以减少属性访问开销
+    # The following methods call `self._dict_getter()` directly instead of via `self._dict` property
+    # to reduce the overhead of attribute access
+
     @property
     def _dict(self):
         return self._dict_getter()
 
     def __len__(self):
-        return len(self._dict)
+        return len(self._dict_getter())
 
     def __getitem__(self, key):
-        if key in self._dict:
-            return self._dict[key]
+        d = self._dict_getter()
+        if key in d:
+            return d[key]
         raise KeyError(key)
 
     def __setitem__(self, key, item):
-        self._dict[key] = item
+        self._dict_getter()[key] = item
 
     def __delitem__(self, key):
-        del self._dict[key]
+        del self._dict_getter()[key]
 
     def __iter__(self):
-        return iter(self._dict)
+        return iter(self._dict_getter())
 
     def __contains__(self, key):
-        return key in self._dict
+        return key in self._dict_getter()
 
     def __repr__(self):
-        return repr(self._dict)
+        return repr(self._dict_getter())
 
     def __setattr__(self, key, value):
         """
@@ -109,16 +147,16 @@ class ObjectDictProxy:
         使用 self.__dict__[name] = value  避免递归
         """
         assert not key.startswith('_'), "Cannot set attributes starting with underscore"
-        self._dict.__setitem__(key, value)
+        self._dict_getter()[key] = value
 
     def __getattr__(self, item):
         """访问一个不存在的属性时触发"""
         assert not item.startswith('_'), 'object has no attribute %s' % item
-        return self._dict.get(item, None)
+        return self._dict_getter().get(item, None)
 
     def __delattr__(self, item):
         try:
-            del self._dict[item]
+            del self._dict_getter()[item]
         except KeyError:
             pass
 